@@ -9,14 +9,20 @@ Local Development:
     uvicorn api.main:app --reload --host 0.0.0.0 --port 8000
 
 Production:
-    uvicorn api.main:app --host 0.0.0.0 --port 8000 --workers 4
+    uvicorn api.main:app --host 0.0.0.0 --port 8000 --loop uvloop --http httptools --workers 4
 
 With Gunicorn (recommended for prod):
-    gunicorn api.main:app -w 4 -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:8000
+    gunicorn api.main:app -w 4 -k uvicorn.workers.UvicornWorker --worker-tmp-dir /dev/shm --bind 0.0.0.0:8000
+
+uvloop and httptools ship with uvicorn[standard]; a warning is logged at
+startup if the server is not running on uvloop.
 
 Local CLI Test (without server):
     python -m api.main --local-test
 
+Pillow-SIMD (requirements.txt; must be compiled on an AVX2-capable host):
+    pip uninstall -y pillow && CC="cc -mavx2" pip install --no-binary=:all: pillow-simd
+
 =============================================================================
 ENVIRONMENT VARIABLES
 =============================================================================
@@ -26,6 +32,8 @@ NEG_ROOT            - Path to negatives folder (default: ./negatives)
 POS_ROOT            - Path to positives folder (default: ./positives)
 OUTPUT_DIR          - Path to output folder (default: ./output)
 FONT_PATH           - Path to font file (default: ./fonts/tiktok-sans-scm.ttf)
+COLLAGE_WORKERS     - Collage render processes (default: CPUs available to the container)
+TILE_CACHE_SIZE     - Decoded source images cached per render process (default: 128, ~1.7 MB max each)
 
 =============================================================================
 API ENDPOINTS
@@ -76,30 +84,48 @@ Generate Video with Banner:
 =============================================================================
 """
 
-import argparse
+import asyncio
 import logging
+import multiprocessing
+import os
+import re
 import sys
-import traceback
 import uuid
-from contextlib import asynccontextmanager
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Literal, Optional
+from typing import Callable, Dict, List, Literal, Optional, Set, Union
 
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+import PIL
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel, Field, field_validator
+from PIL import ImageFont, features
+from pydantic import BaseModel, Field, TypeAdapter, field_validator
 
-# Add parent directory to path for imports when running directly
-sys.path.insert(0, str(Path(__file__).parent.parent))
+# Add parent directory to path for imports when running directly as a script
+# (uvicorn and `python -m api.main` import it as a package and don't need it)
+if not __package__:
+    sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from content_engine.config import Config, get_config, init_config, ConfigError
 from content_engine.generator import (
     generate_batch,
+    generate_batches,
     generate_batch_local,
+    load_font,
+    GeneratorError,
     NoImagesError,
+    SourceImageSizeError,
+)
+from content_engine.storage import (
+    LocalStorageBackend,
+    NullStorageBackend,
+    SaveResult,
+    StorageBackend,
 )
-from content_engine.storage import LocalStorageBackend
 from content_engine.video_generator import generate_video, VideoNotFoundError
 
 # =============================================================================
@@ -117,6 +143,10 @@ logger = logging.getLogger("content_engine.api")
 # Pydantic Models
 # =============================================================================
 
+# Settings are static, so validate against a set built once at import
+_AVAILABLE_SETTINGS = frozenset(Config.SETTINGS)
+
+
 class CaptionItem(BaseModel):
     """A single caption entry for collage generation."""
     text: str = Field(..., description="Caption text to display on the collage")
@@ -138,16 +168,31 @@ class GenerateRequest(BaseModel):
     )
     batch_id: Optional[str] = Field(
         default=None,
-        description="Optional custom batch ID for filenames. Auto-generated if not provided."
+        description=(
+            "Optional custom batch ID for filenames. Auto-generated if not provided. "
+            "8 lowercase hex characters are reserved for generated IDs."
+        )
     )
 
     @field_validator("setting")
     @classmethod
     def validate_setting(cls, v: str) -> str:
-        available = Config.available_settings()
-        if v not in available:
+        if v not in _AVAILABLE_SETTINGS:
+            raise ValueError(
+                f"Unknown setting '{v}'. "
+                f"Available: {', '.join(Config.available_settings())}"
+            )
+        return v
+
+    @field_validator("batch_id")
+    @classmethod
+    def validate_batch_id(cls, v: Optional[str]) -> Optional[str]:
+        # Generated batch directories are served as immutable, so a client
+        # must not be able to write into (or re-render) one
+        if v is not None and StorageBackend.is_generated_batch_id(v):
             raise ValueError(
-                f"Unknown setting '{v}'. Available: {', '.join(available)}"
+                "batch_id must not be 8 lowercase hex characters "
+                "(reserved for generated IDs)"
             )
         return v
 
@@ -167,6 +212,10 @@ class GenerateResponse(BaseModel):
     images: List[GeneratedImage]
 
 
+# Serializes a constructed GenerateResponse straight to JSON bytes
+_RESP_ADAPTER = TypeAdapter(GenerateResponse)
+
+
 class HealthResponse(BaseModel):
     """Response body for /health endpoint."""
     status: str
@@ -202,15 +251,249 @@ class GenerateVideoResponse(BaseModel):
     url: str
 
 
+# =============================================================================
+# Micro-batching
+# =============================================================================
+
+# Coalesce /generate requests arriving within MAX_WAIT_MS of each other,
+# up to MAX_BATCH captions per render pass
+MAX_BATCH = 32
+MAX_WAIT_MS = 20
+
+
+@dataclass
+class _PendingBatch:
+    """A queued /generate request waiting for its render pass."""
+    texts: List[str]
+    types: List[str]
+    setting: str
+    batch_id: str
+    future: "asyncio.Future[List[SaveResult]]"
+
+
+class CollageBatcher:
+    """
+    Coalesces concurrent /generate requests into shared render passes.
+
+    Requests queued close together are grouped by setting and rendered with
+    one generate_batches call per setting, so they share a single executor
+    dispatch. Each request still gets its own batch_id, filenames and
+    outcome - a request that fails doesn't fail the others in its pass.
+
+    If a worker dies and breaks the process pool, executor_factory is used
+    to replace it and the affected batches are retried once.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        storage: StorageBackend,
+        executor: Optional[Executor] = None,
+        font: Optional[ImageFont.FreeTypeFont] = None,
+        max_batch: int = MAX_BATCH,
+        max_wait_ms: float = MAX_WAIT_MS,
+        executor_factory: Optional[Callable[[], Executor]] = None,
+    ):
+        self.config = config
+        self.storage = storage
+        self.executor = executor
+        self.executor_factory = executor_factory
+        # Set if the pool broke and couldn't be replaced (see /health)
+        self.executor_broken = False
+        self.font = font
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "asyncio.Queue[_PendingBatch]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._passes: Set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        """Start the background collector task."""
+        self._task = asyncio.create_task(self._collect())
+
+    async def stop(self) -> None:
+        """Stop collecting and cancel any passes still in flight."""
+        tasks = [self._task, *self._passes] if self._task else list(self._passes)
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+
+    async def submit(
+        self,
+        texts: List[str],
+        types: List[str],
+        setting: str,
+        batch_id: str,
+    ) -> List[SaveResult]:
+        """Queue a batch and wait for its results."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(
+            _PendingBatch(texts, types, setting, batch_id, future)
+        )
+        return await future
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._queue.get()
+            pending = [first]
+            count = len(first.texts)
+            deadline = loop.time() + self.max_wait
+
+            while count < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                count += len(item.texts)
+
+            # Only batches with the same setting can share a pass
+            by_setting: Dict[str, List[_PendingBatch]] = {}
+            for item in pending:
+                by_setting.setdefault(item.setting, []).append(item)
+
+            # Don't wait for the passes - keep collecting while they render
+            for setting, group in by_setting.items():
+                task = asyncio.create_task(self._render(setting, group))
+                self._passes.add(task)
+                task.add_done_callback(self._passes.discard)
+
+    async def _render(self, setting: str, group: List[_PendingBatch]) -> None:
+        executor = self.executor
+        outcomes = await self._run_pass(setting, group, executor)
+
+        # A dead worker (OOM kill, crash on a bad file) breaks the whole
+        # pool. Replace it, and retry just the batches it took down - once,
+        # in case the same input kills a worker again
+        broken = [i for i, o in enumerate(outcomes) if isinstance(o, BrokenProcessPool)]
+        if broken and self._replace_executor(executor):
+            executor = self.executor
+            retried = await self._run_pass(setting, [group[i] for i in broken], executor)
+            for i, outcome in zip(broken, retried):
+                outcomes[i] = outcome
+            if any(isinstance(o, BrokenProcessPool) for o in retried):
+                self._replace_executor(executor)
+
+        # Each request only sees its own batch's result or error
+        for item, outcome in zip(group, outcomes):
+            if item.future.done():
+                continue
+            if isinstance(outcome, Exception):
+                item.future.set_exception(outcome)
+            else:
+                item.future.set_result(outcome)
+
+    async def _run_pass(
+        self,
+        setting: str,
+        group: List[_PendingBatch],
+        executor: Optional[Executor],
+    ) -> List[Union[List[SaveResult], Exception]]:
+        try:
+            return await asyncio.to_thread(
+                generate_batches,
+                [(item.batch_id, item.texts, item.types) for item in group],
+                setting_name=setting,
+                config=self.config,
+                storage=self.storage,
+                executor=executor,
+                font=self.font,
+                return_exceptions=True,
+            )
+        except Exception as e:
+            return [e] * len(group)
+
+    def _replace_executor(self, broken: Optional[Executor]) -> bool:
+        """Swap out a broken executor. Returns True if a working one is in place."""
+        if self.executor is not broken:
+            return True  # Already replaced by a concurrent pass
+        if self.executor_factory is None:
+            self.executor_broken = True
+            return False
+        logger.error("Process pool is broken (a worker died); replacing it")
+        if broken is not None:
+            broken.shutdown(wait=False, cancel_futures=True)
+        try:
+            self.executor = self.executor_factory()
+        except Exception:
+            logger.exception("Could not replace the process pool")
+            self.executor_broken = True
+            return False
+        self.executor_broken = False
+        return True
+
+
+# =============================================================================
+# Static Files
+# =============================================================================
+
+# /output/video_{scenario}_{uuid}.mp4, as written by /generate-video
+_GENERATED_VIDEO_NAME = re.compile(r"video_.+_[0-9a-f]{8}\.mp4")
+
+
+class OutputStaticFiles(StaticFiles):
+    """
+    StaticFiles that lets browsers and CDNs cache server-named files forever.
+
+    Only paths named by the server are unique and never rewritten: collages
+    under a generated batch ID ({date}/{batch_id}/{file}) and videos with a
+    uuid in their name. (A pass retried after a pool failure rewrites its
+    files, but before their URLs have been returned.) Anything else, e.g. a
+    client-chosen batch_id that a later request reuses, gets a short max-age
+    and is revalidated through ETag/Last-Modified.
+    """
+
+    @staticmethod
+    def is_immutable(path: str) -> bool:
+        parts = Path(path).parts
+        if len(parts) == 3:
+            return StorageBackend.is_generated_batch_id(parts[1])
+        return len(parts) == 1 and _GENERATED_VIDEO_NAME.fullmatch(parts[0]) is not None
+
+    async def get_response(self, path: str, scope) -> Response:
+        response = await super().get_response(path, scope)
+        if self.is_immutable(path):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response.headers["Cache-Control"] = "public, max-age=60"
+        return response
+
+
 # =============================================================================
 # Lifespan - Startup/Shutdown Events
 # =============================================================================
 
+def _log_pillow_build() -> None:
+    """Log the Pillow version and whether it's a SIMD / libjpeg-turbo build."""
+    # Pillow-SIMD releases carry a ".postN" suffix (e.g. "9.5.0.post1")
+    logger.info(
+        f"Pillow {PIL.__version__} "
+        f"(SIMD build: {'.post' in PIL.__version__}, "
+        f"libjpeg-turbo: {features.check_feature('libjpeg_turbo')})"
+    )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Initialize configuration and mount static files on startup."""
     config = get_config()
 
+    # uvloop roughly halves event-loop overhead compared to stock asyncio
+    loop_module = type(asyncio.get_running_loop()).__module__
+    if not loop_module.startswith("uvloop"):
+        logger.warning(
+            f"Running on {loop_module} event loop; install uvloop and httptools "
+            "(uvicorn[standard]) and start with --loop uvloop --http httptools"
+        )
+
+    _log_pillow_build()
+
     # Validate configuration
     try:
         config.validate()
@@ -222,20 +505,75 @@ async def lifespan(app: FastAPI):
     # Ensure output directory exists
     config.ensure_output_dir()
 
+    # Shared per-process instances, reused by every request
+    app.state.config = config
+    app.state.storage = LocalStorageBackend(config)
+
+    # Caption font for in-process rendering. Process-pool workers load their
+    # own copy through text.get_font, so it isn't shipped with their tasks
+    app.state.font = load_font(config) if config.font_path.is_file() else None
+
     # Mount output directory as static files
     # This makes generated images accessible at /output/...
+    # The directory is resolved once here; follow_symlink skips the per-request
+    # realpath() since everything under it is written by us.
     if config.output_dir.is_dir():
         app.mount(
             "/output",
-            StaticFiles(directory=str(config.output_dir)),
+            OutputStaticFiles(
+                directory=str(config.output_dir.resolve()),
+                html=False,
+                check_dir=True,
+                follow_symlink=True,
+            ),
             name="output"
         )
         logger.info(f"Mounted static files at /output -> {config.output_dir}")
 
+    # Process pool for rendering batch captions in parallel (bypasses the GIL).
+    # Spawned rather than forked so workers don't inherit the server's threads.
+    # The batcher calls new_process_pool again if a worker dies and breaks it.
+    workers = max(1, config.collage_workers)
+
+    def new_process_pool() -> ProcessPoolExecutor:
+        app.state.process_pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        return app.state.process_pool
+
+    new_process_pool()
+    logger.info(f"Collage process pool: {workers} workers")
+
+    # Render throwaway collages so worker spawn, font parsing and image
+    # folder listings are paid during boot rather than by the first request.
+    # One caption per worker so every pool process gets started.
+    try:
+        await asyncio.to_thread(
+            generate_batch,
+            texts=["warmup"] * workers,
+            types=["neg"] * workers,
+            setting_name="default",
+            batch_id="_warmup",
+            config=config,
+            storage=NullStorageBackend(),
+            executor=app.state.process_pool,
+        )
+        logger.info("Generator warmed up")
+    except Exception:
+        logger.warning("Warmup skipped", exc_info=True)
+
+    app.state.batcher = CollageBatcher(
+        config, app.state.storage, app.state.process_pool,
+        executor_factory=new_process_pool,
+    )
+    app.state.batcher.start()
+
     yield  # Application runs here
 
-    # Shutdown logic (if needed) would go here
     logger.info("Shutting down Content Engine API")
+    await app.state.batcher.stop()
+    app.state.process_pool.shutdown(wait=True, cancel_futures=True)
 
 
 # =============================================================================
@@ -248,6 +586,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan,
 )
 
@@ -260,7 +599,7 @@ app = FastAPI(
 async def no_images_error_handler(request: Request, exc: NoImagesError):
     """Handle missing images in folders."""
     logger.error(f"No images in folder: {exc.folder}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "NO_IMAGES_IN_FOLDER",
@@ -269,11 +608,24 @@ async def no_images_error_handler(request: Request, exc: NoImagesError):
     )
 
 
+@app.exception_handler(SourceImageSizeError)
+async def source_image_size_error_handler(request: Request, exc: SourceImageSizeError):
+    """Handle source images that aren't pre-sized (REQUIRE_PRESIZED_IMAGES)."""
+    logger.error(f"Source image not pre-sized: {exc.path}")
+    return ORJSONResponse(
+        status_code=500,
+        content={
+            "error": "SOURCE_IMAGE_NOT_PRESIZED",
+            "detail": str(exc),
+        }
+    )
+
+
 @app.exception_handler(ConfigError)
 async def config_error_handler(request: Request, exc: ConfigError):
     """Handle configuration errors."""
     logger.error(f"Configuration error: {exc}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "CONFIG_ERROR",
@@ -286,7 +638,7 @@ async def config_error_handler(request: Request, exc: ConfigError):
 async def video_not_found_handler(request: Request, exc: VideoNotFoundError):
     """Handle missing video scenario."""
     logger.error(f"Video not found: {exc.scenario}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=404,
         content={
             "error": "VIDEO_NOT_FOUND",
@@ -304,8 +656,12 @@ async def health_check():
     """
     Health check endpoint.
 
-    Returns {"status": "ok"} when the service is running.
+    Returns {"status": "ok"} when the service is running, or a 503 if the
+    render process pool is broken and couldn't be replaced.
     """
+    batcher = getattr(app.state, "batcher", None)
+    if batcher is not None and batcher.executor_broken:
+        return ORJSONResponse(status_code=503, content={"status": "process_pool_broken"})
     return {"status": "ok"}
 
 
@@ -355,7 +711,7 @@ async def debug_ffmpeg():
     },
     tags=["Generation"],
 )
-async def generate_collages(request: GenerateRequest):
+async def generate_collages(request: GenerateRequest, http_request: Request):
     """
     Generate collage images from captions.
 
@@ -364,7 +720,7 @@ async def generate_collages(request: GenerateRequest):
 
     The generated images are saved locally and accessible via the returned URLs.
     """
-    config = get_config()
+    storage = http_request.app.state.storage
 
     logger.info(
         f"Generate request: count={len(request.captions)}, "
@@ -372,39 +728,30 @@ async def generate_collages(request: GenerateRequest):
     )
 
     try:
-        # Convert Pydantic models to dicts for generator
-        captions_list = [
-            {"text": c.text, "type": c.type}
-            for c in request.captions
-        ]
-
-        # Create storage backend
-        storage = LocalStorageBackend(config)
+        # Split captions into parallel lists for the generator
+        texts = [c.text for c in request.captions]
+        types = [c.type for c in request.captions]
 
         # Determine batch_id
         batch_id = request.batch_id or storage.generate_batch_id()
 
-        # Generate all collages
-        results = generate_batch(
-            captions=captions_list,
-            setting_name=request.setting,
-            batch_id=batch_id,
-            config=config,
-            storage=storage,
+        # Generate all collages. The batcher renders off the event loop,
+        # sharing the pass with any requests that arrive alongside this one
+        results = await http_request.app.state.batcher.submit(
+            texts, types, request.setting, batch_id
         )
 
-        # Build response
+        # Build response (trusted data we just produced - skip re-validation)
         images = []
-        for i, result in enumerate(results):
-            caption_entry = request.captions[i]
-            images.append(GeneratedImage(
-                caption=caption_entry.text,
-                type=caption_entry.type,
+        for text, kind, result in zip(texts, types, results):
+            images.append(GeneratedImage.model_construct(
+                caption=text,
+                type=kind,
                 filename=result.filename,
                 url=result.url,
             ))
 
-        response = GenerateResponse(
+        response = GenerateResponse.model_construct(
             batch_id=batch_id,
             count=len(images),
             images=images,
@@ -412,18 +759,23 @@ async def generate_collages(request: GenerateRequest):
 
         logger.info(f"Generated {len(images)} images for batch {batch_id}")
 
-        return response
+        # Returning a Response skips FastAPI's response_model round-trip
+        return Response(
+            content=_RESP_ADAPTER.dump_json(response),
+            media_type="application/json",
+        )
 
     except ValueError as e:
         logger.error(f"Validation error: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
-    except NoImagesError:
-        # Re-raise to be handled by exception handler
+    except GeneratorError:
+        # Re-raise to be handled by exception handlers (server-side asset
+        # problems, not client errors)
         raise
 
     except Exception as e:
-        logger.error(f"Unexpected error: {e}\n{traceback.format_exc()}")
+        logger.exception("Unexpected error: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Internal server error: {str(e)}"
@@ -457,8 +809,9 @@ async def generate_video_endpoint(request: GenerateVideoRequest):
         filename = f"video_{request.scenario}_{video_id}.mp4"
         output_path = config.output_dir / filename
 
-        # Generate the video
-        generate_video(
+        # Generate the video (blocking ffmpeg work runs in a thread)
+        await asyncio.to_thread(
+            generate_video,
             scenario=request.scenario,
             caption=request.caption,
             output_path=output_path,
@@ -486,7 +839,7 @@ async def generate_video_endpoint(request: GenerateVideoRequest):
         raise
 
     except Exception as e:
-        logger.error(f"Video generation error: {e}\n{traceback.format_exc()}")
+        logger.exception("Video generation error: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Video generation failed: {str(e)}"
@@ -514,6 +867,8 @@ def run_local_test():
     print(f"FONT_PATH: {config.font_path}")
     print()
 
+    _log_pillow_build()
+
     # Validate configuration
     try:
         config.validate()
@@ -523,21 +878,23 @@ def run_local_test():
         sys.exit(1)
 
     # Test captions
-    test_captions = [
-        {"text": "the road to hell feels like heaven", "type": "neg"},
-        {"text": "the road to heaven feels like hell", "type": "pos"},
-        {"text": "keep scrolling bro...", "type": "neg"},
-        {"text": "this fyp aint for everyone", "type": "pos"},
+    test_texts = [
+        "the road to hell feels like heaven",
+        "the road to heaven feels like hell",
+        "keep scrolling bro...",
+        "this fyp aint for everyone",
     ]
+    test_types = ["neg", "pos", "neg", "pos"]
 
     print()
-    print(f"Generating {len(test_captions)} test collages...")
+    print(f"Generating {len(test_texts)} test collages...")
     print()
 
     # Generate using local batch mode
     try:
         paths = generate_batch_local(
-            captions=test_captions,
+            texts=test_texts,
+            types=test_types,
             setting_name="3s",
             config=config,
         )
@@ -549,22 +906,14 @@ def run_local_test():
         for path in paths:
             print(f"  {path}")
 
-    except NoImagesError as e:
+    except GeneratorError as e:
         print(f"Error: {e}")
         sys.exit(1)
 
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Content Engine API")
-    parser.add_argument(
-        "--local-test",
-        action="store_true",
-        help="Run local test without starting server"
-    )
-
-    args = parser.parse_args()
-
-    if args.local_test:
+    # Single flag - not worth importing argparse for
+    if "--local-test" in sys.argv[1:]:
         run_local_test()
     else:
         # Print usage hint
@@ -7,14 +7,16 @@ Package structure:
         config.py           - Configuration, paths, settings
         generator.py        - Pure collage generation logic
         storage.py          - Storage backend abstraction (local/S3)
+        text.py             - Font and rendered-text caches
+        video_generator.py  - Banner video generation
     api/
         __init__.py
         main.py             - FastAPI application
 """
 
 from .config import Config, get_config
-from .generator import generate_collage, generate_batch
-from .storage import LocalStorageBackend, StorageBackend
+from .generator import generate_collage, generate_batch, generate_batches
+from .storage import LocalStorageBackend, NullStorageBackend, StorageBackend
 from .video_generator import generate_video, VideoNotFoundError
 
 __all__ = [
@@ -22,8 +24,10 @@ __all__ = [
     "get_config",
     "generate_collage",
     "generate_batch",
+    "generate_batches",
     "generate_video",
     "LocalStorageBackend",
+    "NullStorageBackend",
     "StorageBackend",
     "VideoNotFoundError",
 ]
@@ -10,7 +10,7 @@ Handles:
 
 import os
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from functools import lru_cache
 
 # Try to load .env file if python-dotenv is available
@@ -26,6 +26,61 @@ class ConfigError(Exception):
     pass
 
 
+def available_cpus() -> int:
+    """
+    Number of CPUs this process can actually use.
+
+    os.cpu_count() reports the host's CPUs even inside a container, so use
+    the scheduler affinity mask, capped by a cgroup v2 CPU quota if set.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        # No affinity API on macOS/Windows
+        cpus = os.cpu_count() or 1
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, -(-int(quota) // int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+# A tile: ((width, height), (x, y)) of one source image on the canvas
+Tile = Tuple[Tuple[int, int], Tuple[int, int]]
+
+
+def layout_tiles(layout: str, image_size: Tuple[int, int], count: int) -> List[Tile]:
+    """
+    Compute the size and position of each source image for a layout.
+
+    Args:
+        layout: Layout name ("2x2", "3s_split" or "portrait")
+        image_size: Cell size for the 2x2 grid
+        count: Number of source images
+
+    Returns:
+        One tile per source image, in placement order
+    """
+    tiles = []
+    for i in range(count):
+        if layout == "3s_split":
+            # 3s layout: 2 square images on left (540x540), 1 portrait on right (540x1080)
+            if i < 2:
+                tiles.append(((540, 540), (0, i * 540)))
+            else:
+                tiles.append(((540, 1080), (540, 0)))
+        elif layout == "portrait":
+            # Portrait layout: stack 3 images vertically (540x360 each)
+            tiles.append(((540, 360), (0, i * 360)))
+        else:
+            # Default 2x2 grid layout
+            width, height = image_size
+            tiles.append(((width, height), ((i % 2) * width, (i // 2) * height)))
+    return tiles
+
+
 class Config:
     """
     Centralized configuration for the content engine.
@@ -56,6 +111,12 @@ class Config:
     OVERLAY_OPACITY: int = int(255 * 0.44)
     FONT_SIZE: int = 32
     VALID_IMAGE_EXTENSIONS: tuple = (".jpg", ".jpeg", ".png")
+    # Sources are pre-sized by formatPhoto.py, so the runtime resize is only a
+    # fallback. Set to True to reject images that would need it.
+    REQUIRE_PRESIZED_IMAGES: bool = False
+    # zlib level for saved PNGs. 1 encodes several times faster than the
+    # default 6 for somewhat larger files.
+    PNG_COMPRESS_LEVEL: int = 1
 
     def __init__(
         self,
@@ -119,6 +180,26 @@ class Config:
         # Ensure no trailing slash
         self.public_base_url = self.public_base_url.rstrip("/")
 
+        # Collage render processes. Each keeps its own decoded-tile cache,
+        # so memory grows with this (see TILE_CACHE_SIZE)
+        self.collage_workers = int(
+            os.environ.get("COLLAGE_WORKERS") or available_cpus()
+        )
+
+        # Settings with their tile tables precomputed, so collages don't
+        # redo the layout dispatch and arithmetic per image
+        self.settings: Dict[str, Dict[str, Any]] = {
+            name: {
+                **setting,
+                "tiles": layout_tiles(
+                    setting["layout"],
+                    tuple(setting["image_size"]),
+                    max(len(setting["neg_subfolders"]), len(setting["pos_subfolders"])),
+                ),
+            }
+            for name, setting in self.SETTINGS.items()
+        }
+
     def _resolve_path(
         self,
         explicit: Optional[Path],
@@ -160,17 +241,18 @@ class Config:
             setting_name: Name of the setting (e.g., "default", "3s")
 
         Returns:
-            Setting configuration dict
+            Setting configuration dict, including a precomputed "tiles" list
+            of ((width, height), (x, y)) per source image
 
         Raises:
             ConfigError: If setting name is not found
         """
-        if setting_name not in self.SETTINGS:
-            available = ", ".join(self.SETTINGS.keys())
+        if setting_name not in self.settings:
+            available = ", ".join(self.settings.keys())
             raise ConfigError(
                 f"Unknown setting '{setting_name}'. Available: {available}"
             )
-        return self.SETTINGS[setting_name]
+        return self.settings[setting_name]
 
     def get_subfolders(self, kind: str, setting_name: str) -> List[str]:
         """
@@ -213,26 +295,25 @@ class Config:
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
     @classmethod
-    def available_settings(cls) -> List[str]:
-        """Return list of available setting names."""
-        return list(cls.SETTINGS.keys())
+    @lru_cache(maxsize=None)
+    def available_settings(cls) -> Tuple[str, ...]:
+        """Return the available setting names (cached, SETTINGS is static)."""
+        return tuple(cls.SETTINGS)
 
 
-# Global config instance (lazy-loaded)
-_config: Optional[Config] = None
+# Overrides for the global config instance, set by init_config()
+_config_overrides: Dict[str, Any] = {}
 
 
+@lru_cache(maxsize=1)
 def get_config() -> Config:
     """
     Get the global Config instance.
 
     Creates a new instance on first call, reuses it thereafter.
-    For testing, you can set _config directly or use init_config().
+    For testing, use init_config() to replace it.
     """
-    global _config
-    if _config is None:
-        _config = Config()
-    return _config
+    return Config(**_config_overrides)
 
 
 def init_config(**kwargs) -> Config:
@@ -241,6 +322,7 @@ def init_config(**kwargs) -> Config:
 
     Use this to override the default configuration.
     """
-    global _config
-    _config = Config(**kwargs)
-    return _config
+    _config_overrides.clear()
+    _config_overrides.update(kwargs)
+    get_config.cache_clear()
+    return get_config()
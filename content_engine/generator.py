@@ -9,18 +9,25 @@ Pure functions for:
 
 Main entry points:
     generate_collage(caption, kind, setting_name) -> Path
-    generate_batch(captions, setting_name, batch_id) -> list[SaveResult]
+    generate_batch(texts, types, setting_name, batch_id) -> list[SaveResult]
+    generate_batches(batches, setting_name) -> list[list[SaveResult]]
 """
 
 import logging
+import os
 import random
+import stat
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple, Union
 
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
-from .config import Config, get_config
+from .config import Config, available_cpus, get_config
 from .storage import StorageBackend, LocalStorageBackend, SaveResult
+from .text import draw_text, get_font, text_bbox
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +44,82 @@ class NoImagesError(GeneratorError):
         self.folder = folder
         super().__init__(f"No images found in {folder}")
 
+    def __reduce__(self):
+        # Rebuild from the folder, not the message, so the error keeps its
+        # text when it's raised in a process-pool worker
+        return (type(self), (self.folder,))
+
+
+class SourceImageSizeError(GeneratorError):
+    """Raised when REQUIRE_PRESIZED_IMAGES is on and a source image isn't pre-sized."""
+
+    def __init__(self, path: str, size: Tuple[int, int], expected: Tuple[int, int]):
+        self.path = path
+        self.size = size
+        self.expected = expected
+        super().__init__(
+            f"{path} is {size[0]}x{size[1]}, expected "
+            f"{expected[0]}x{expected[1]} (run formatPhoto.py on the source folder)"
+        )
+
+    def __reduce__(self):
+        # Rebuilt from its fields so it survives the process pool intact
+        return (type(self), (self.path, self.size, self.expected))
+
+
+@lru_cache(maxsize=16)
+def _darken_lut(opacity: int) -> List[int]:
+    """
+    Per-channel lookup table for blending solid black at opacity over RGB.
+
+    Same rounding as alpha_composite: round(v * (255 - opacity) / 255).
+    Repeated for R, G and B, as Image.point expects.
+    """
+    values = np.arange(256, dtype=np.uint32)
+    lut = ((values * (255 - opacity) + 127) // 255).astype(np.uint8)
+    return lut.tolist() * 3
+
+
+def apply_overlay(canvas: Image.Image, opacity: int) -> Image.Image:
+    """
+    Darken a canvas with a semi-transparent black overlay.
+
+    A constant-alpha black overlay is just a per-channel scale, so this is a
+    single lookup-table pass over the RGB canvas - no RGBA copy, overlay
+    image or alpha_composite.
+
+    Args:
+        canvas: RGB image
+        opacity: Overlay alpha (0-255)
+
+    Returns:
+        Darkened RGB image
+    """
+    return canvas.point(_darken_lut(opacity))
+
+
+def load_font(config: Optional[Config] = None) -> ImageFont.FreeTypeFont:
+    """Load the caption font (config.font_path at config.FONT_SIZE)."""
+    config = config or get_config()
+    return get_font(str(config.font_path), config.FONT_SIZE)
+
+
+@lru_cache(maxsize=64)
+def _list_images(
+    folder: Path, mtime_ns: int, extensions: Tuple[str, ...]
+) -> Tuple[Path, ...]:
+    """
+    List image files in a directory.
+
+    Cached by directory mtime, so adding or removing files invalidates the
+    entry. Returns a tuple so the cached value can be shared across threads.
+    """
+    with os.scandir(folder) as entries:
+        return tuple(
+            folder / entry.name for entry in entries
+            if entry.is_file() and os.path.splitext(entry.name)[1].lower() in extensions
+        )
+
 
 def pick_random_image(folder: Path, config: Optional[Config] = None) -> Path:
     """
@@ -54,14 +137,17 @@ def pick_random_image(folder: Path, config: Optional[Config] = None) -> Path:
     """
     config = config or get_config()
 
-    if not folder.is_dir():
+    # One stat both checks the folder and keys the listing cache
+    try:
+        st = folder.stat()
+    except OSError:
+        raise NoImagesError(folder)
+    if not stat.S_ISDIR(st.st_mode):
         raise NoImagesError(folder)
 
-    valid_extensions = config.VALID_IMAGE_EXTENSIONS
-    images = [
-        f for f in folder.iterdir()
-        if f.is_file() and f.suffix.lower() in valid_extensions
-    ]
+    images = _list_images(
+        folder, st.st_mtime_ns, tuple(config.VALID_IMAGE_EXTENSIONS)
+    )
 
     if not images:
         raise NoImagesError(folder)
@@ -102,11 +188,58 @@ def pick_images_for_collage(
     return image_paths
 
 
+# Decoded tiles kept per process. Every pool worker has its own cache, so this
+# bounds each worker's memory (TILE_CACHE_SIZE env var, read at import)
+TILE_CACHE_SIZE = int(os.environ.get("TILE_CACHE_SIZE") or 128)
+
+
+@lru_cache(maxsize=TILE_CACHE_SIZE)
+def _decode_resized(
+    path_str: str, size: Tuple[int, int], mtime_ns: int, strict: bool
+) -> Image.Image:
+    """
+    Decode a source image and resize it to a layout cell.
+
+    Cached by (path, size, mtime) so images picked again by later collages
+    skip the decode and resample. At most ~1.7 MB per entry (540x1080 RGB).
+    The returned image is shared - only paste from it, never modify it.
+    """
+    img = Image.open(path_str)
+    # Sources pre-sized by formatPhoto.py skip the resample entirely
+    if img.size != size:
+        if strict:
+            img.close()
+            raise SourceImageSizeError(path_str, img.size, size)
+        # JPEGs decode straight at the smallest 1/2, 1/4 or 1/8 scale that
+        # still covers the cell (a no-op for other formats)
+        img.draft("RGB", size)
+        # Explicit BILINEAR: fast, and plenty for the occasional off-size
+        # source (formatPhoto.py keeps LANCZOS for the offline crop)
+        with img:
+            img = img.resize(size, Image.BILINEAR)
+    else:
+        img.load()  # also closes the file
+    return img if img.mode == "RGB" else img.convert("RGB")
+
+
+def load_resized(
+    path: Path, size: Tuple[int, int], strict: bool = False
+) -> Image.Image:
+    """
+    Return the source image at path resized to size (cached, read-only).
+
+    With strict=True, raise SourceImageSizeError instead of resizing an
+    image that isn't already at size.
+    """
+    return _decode_resized(str(path), size, path.stat().st_mtime_ns, strict)
+
+
 def build_collage_image(
     image_paths: List[Path],
     caption: str,
     setting_config: Dict[str, Any],
-    config: Optional[Config] = None
+    config: Optional[Config] = None,
+    font: Optional[ImageFont.FreeTypeFont] = None,
 ) -> Image.Image:
     """
     Build a collage image from source images.
@@ -114,72 +247,55 @@ def build_collage_image(
     Args:
         image_paths: List of paths to source images
         caption: Text to overlay on the collage
-        setting_config: Layout configuration dict
+        setting_config: Layout configuration dict, as from Config.get_setting
         config: Configuration instance
+        font: Preloaded caption font. Loaded from config.font_path if not provided.
 
     Returns:
-        PIL Image of the completed collage (RGBA mode)
+        PIL Image of the completed collage (RGB)
     """
     config = config or get_config()
 
     canvas_size = tuple(setting_config["canvas_size"])
-    image_size = tuple(setting_config["image_size"])
-    layout = setting_config["layout"]
+    strict = config.REQUIRE_PRESIZED_IMAGES
 
     # Create base canvas
     canvas = Image.new("RGB", canvas_size)
 
-    # Place images according to layout
-    if layout == "3s_split":
-        # 3s layout: 2 square images on left (540x540), 1 portrait on right (540x1080)
-        for i, path in enumerate(image_paths):
-            img = Image.open(path)
-            if i < 2:
-                # First 2 images: left side, stacked vertically
-                img = img.resize((540, 540))
-                x = 0
-                y = i * 540
-            else:
-                # Third image: right side, full height portrait
-                img = img.resize((540, 1080))
-                x = 540
-                y = 0
-            canvas.paste(img, (x, y))
-
-    elif layout == "portrait":
-        # Portrait layout: stack 3 images vertically (540x360 each)
-        portrait_image_size = (540, 360)
-        for i, path in enumerate(image_paths):
-            img = Image.open(path).resize(portrait_image_size)
-            x = 0
-            y = i * 360
-            canvas.paste(img, (x, y))
-
-    else:
-        # Default 2x2 grid layout
-        for i, path in enumerate(image_paths):
-            img = Image.open(path).resize(image_size)
-            x = (i % 2) * image_size[0]
-            y = (i // 2) * image_size[1]
-            canvas.paste(img, (x, y))
+    # Place images at their precomputed tiles (see Config.get_setting).
+    # paste() of a same-mode RGB tile is
+    # already a row-wise memcpy in C; composing in a NumPy array measured
+    # slower because Image.fromarray has to repack the 3-byte pixels.
+    for path, (size, position) in zip(image_paths, setting_config["tiles"]):
+        canvas.paste(load_resized(path, size, strict), position)
 
     # Apply semi-transparent black overlay
-    overlay = Image.new("RGBA", canvas_size, (0, 0, 0, config.OVERLAY_OPACITY))
-    canvas = canvas.convert("RGBA")
-    canvas = Image.alpha_composite(canvas, overlay)
-
-    # Add centered caption text
-    draw = ImageDraw.Draw(canvas)
-    font = ImageFont.truetype(str(config.font_path), config.FONT_SIZE)
+    canvas = apply_overlay(canvas, config.OVERLAY_OPACITY)
+
+    # Add centered caption text. Fonts loaded from a path go through the
+    # shared measurement and text-mask caches
+    if font is None:
+        font_key = (str(config.font_path), config.FONT_SIZE)
+    elif isinstance(font.path, str):
+        font_key = (font.path, font.size)
+    else:
+        font_key = None
 
-    bbox = draw.textbbox((0, 0), caption, font=font)
+    if font_key is not None:
+        bbox = text_bbox(caption, *font_key)
+    else:
+        draw = ImageDraw.Draw(canvas)
+        bbox = draw.textbbox((0, 0), caption, font=font)
     text_w = bbox[2] - bbox[0]
     text_h = bbox[3] - bbox[1]
 
     x = (canvas_size[0] - text_w) / 2
     y = (canvas_size[1] - text_h) / 2
 
-    draw.text((x, y), caption, font=font, fill="white")
+    if font_key is not None:
+        draw_text(canvas, (x, y), caption, *font_key, fill=(255, 255, 255))
+    else:
+        draw.text((x, y), caption, font=font, fill="white")
 
     return canvas
 
@@ -189,6 +305,7 @@ def generate_collage(
     kind: str,
     setting_name: str = "default",
     config: Optional[Config] = None,
+    font: Optional[ImageFont.FreeTypeFont] = None,
 ) -> Image.Image:
     """
     Generate a single collage image.
@@ -200,6 +317,7 @@ def generate_collage(
         kind: "neg" or "pos" - determines which image folders to use
         setting_name: Layout setting name (default: "default")
         config: Configuration instance
+        font: Preloaded caption font. Loaded from config.font_path if not provided.
 
     Returns:
         PIL Image of the completed collage
@@ -226,31 +344,71 @@ def generate_collage(
     )
 
     # Build the collage
-    collage = build_collage_image(image_paths, caption, setting_config, config)
+    collage = build_collage_image(image_paths, caption, setting_config, config, font)
 
     return collage
 
 
+def _render_and_save(
+    index: int,
+    text: str,
+    kind: str,
+    setting_name: str,
+    batch_id: str,
+    config: Config,
+    storage: StorageBackend,
+    font: Union[ImageFont.FreeTypeFont, Tuple[str, int], None] = None,
+) -> SaveResult:
+    """
+    Render one caption of a batch and save it.
+
+    Module-level (and therefore picklable) so it can be dispatched to a
+    process pool by generate_batch. font may be a (path, size) key, which
+    is resolved through get_font's per-thread cache.
+    """
+    if isinstance(font, tuple):
+        font = get_font(*font)
+
+    # Generate the collage image
+    collage = generate_collage(text, kind, setting_name, config, font)
+
+    # Create filename
+    filename = f"{kind}_{index + 1}.png"
+
+    # Save using storage backend
+    result = storage.save(collage, batch_id, filename)
+
+    logger.debug(f"Saved: {result.filename} -> {result.url}")
+
+    return result
+
+
 def generate_batch(
-    captions: List[Dict[str, str]],
+    texts: List[str],
+    types: List[str],
     setting_name: str = "default",
     batch_id: Optional[str] = None,
     config: Optional[Config] = None,
     storage: Optional[StorageBackend] = None,
+    executor: Optional[Executor] = None,
+    font: Optional[ImageFont.FreeTypeFont] = None,
 ) -> List[SaveResult]:
     """
     Generate a batch of collages and save them.
 
     Args:
-        captions: List of dicts with "text" and "type" keys
-            Example: [{"text": "caption here", "type": "neg"}, ...]
+        texts: Caption texts, one per collage
+        types: "neg" or "pos" for each entry of texts (same length)
         setting_name: Layout setting name (default: "default")
         batch_id: Optional batch identifier. Generated if not provided.
         config: Configuration instance
         storage: Storage backend for saving. Uses LocalStorageBackend if not provided.
+        executor: Optional executor (e.g. a ProcessPoolExecutor) to render
+            captions in parallel. A thread pool is used if not provided.
+        font: Caption font. Defaults to config.font_path at config.FONT_SIZE.
 
     Returns:
-        List of SaveResult objects with paths and URLs
+        List of SaveResult objects with paths and URLs, in caption order
 
     Raises:
         NoImagesError: If any required folder has no images
@@ -258,10 +416,11 @@ def generate_batch(
         ValueError: If any caption has invalid type
 
     Example:
-        results = generate_batch([
-            {"text": "road to hell", "type": "neg"},
-            {"text": "road to heaven", "type": "pos"},
-        ], setting_name="3s")
+        results = generate_batch(
+            ["road to hell", "road to heaven"],
+            ["neg", "pos"],
+            setting_name="3s",
+        )
         for r in results:
             print(r.url)
     """
@@ -273,42 +432,138 @@ def generate_batch(
 
     logger.info(
         f"Starting batch generation: batch_id={batch_id}, "
-        f"count={len(captions)}, setting={setting_name}"
+        f"count={len(texts)}, setting={setting_name}"
     )
 
-    results = []
+    results = generate_batches(
+        [(batch_id, texts, types)],
+        setting_name=setting_name,
+        config=config,
+        storage=storage,
+        executor=executor,
+        font=font,
+    )[0]
 
-    for i, caption_entry in enumerate(captions):
-        text = caption_entry["text"]
-        kind = caption_entry["type"]
+    logger.info(f"Batch complete: {len(results)} images generated")
 
-        if kind not in ("neg", "pos"):
-            raise ValueError(
-                f"Invalid type '{kind}' in caption {i}. Must be 'neg' or 'pos'."
-            )
+    return results
 
-        # Generate the collage image
-        collage = generate_collage(text, kind, setting_name, config)
 
-        # Create filename
-        filename = f"{kind}_{i + 1}.png"
+def generate_batches(
+    batches: List[Tuple[str, List[str], List[str]]],
+    setting_name: str = "default",
+    config: Optional[Config] = None,
+    storage: Optional[StorageBackend] = None,
+    executor: Optional[Executor] = None,
+    font: Optional[ImageFont.FreeTypeFont] = None,
+    return_exceptions: bool = False,
+) -> List[Union[List[SaveResult], Exception]]:
+    """
+    Generate several batches that share a setting in a single render pass.
 
-        # Save using storage backend
-        result = storage.save(collage, batch_id, filename)
-        results.append(result)
+    All captions of all batches are dispatched together, but batch_id,
+    filenames and numbering stay per batch, exactly as if each batch had
+    gone through generate_batch on its own.
 
-        logger.debug(f"Saved: {result.filename} -> {result.url}")
+    Args:
+        batches: List of (batch_id, texts, types), texts/types as in generate_batch
+        setting_name: Layout setting name shared by every batch
+        config: Configuration instance
+        storage: Storage backend for saving. Uses LocalStorageBackend if not provided.
+        executor: Optional executor to render captions in parallel. A thread
+            pool sized to the CPU count is used if not provided.
+        font: Caption font. Defaults to config.font_path at config.FONT_SIZE.
+        return_exceptions: If True, a failing batch doesn't fail the others:
+            its entry in the result is the exception instead of a list.
 
-    logger.info(f"Batch complete: {len(results)} images generated")
+    Returns:
+        One list of SaveResult objects (or, with return_exceptions, the
+        batch's exception) per batch, in input order
 
-    return results
+    Raises:
+        NoImagesError: If any required folder has no images
+        ConfigError: If setting_name is invalid
+        ValueError: If any caption has invalid type
+        (Only without return_exceptions.)
+    """
+    config = config or get_config()
+    storage = storage or LocalStorageBackend(config)
+
+    # Validate every batch up front so no work is dispatched for a bad one
+    errors: List[Optional[Exception]] = []
+    for batch_id, texts, types in batches:
+        error = None
+        if len(texts) != len(types):
+            error = ValueError(
+                f"Got {len(texts)} texts but {len(types)} types in batch {batch_id}"
+            )
+        else:
+            for i, kind in enumerate(types):
+                if kind not in ("neg", "pos"):
+                    error = ValueError(
+                        f"Invalid type '{kind}' in caption {i}. Must be 'neg' or 'pos'."
+                    )
+                    break
+        if error is not None and not return_exceptions:
+            raise error
+        errors.append(error)
+
+    # A FreeTypeFont loaded from a path pickles as (path, size) and is
+    # re-parsed on every unpickle, so send just the key and let each worker
+    # reuse its own cached face
+    font_arg = font
+    if font is not None and isinstance(font.path, str):
+        font_arg = (font.path, font.size)
+
+    def render(pool: Executor) -> List[Union[List[SaveResult], Exception]]:
+        # One future per caption. Decoding, resizing and PNG encoding release
+        # the GIL, so threads scale across cores when no pool is given
+        batch_futures = [
+            [] if error is not None else [
+                pool.submit(
+                    _render_and_save, i, text, kind, setting_name, batch_id,
+                    config, storage, font_arg,
+                )
+                for i, (text, kind) in enumerate(zip(texts, types))
+            ]
+            for (batch_id, texts, types), error in zip(batches, errors)
+        ]
+
+        # Resolve each batch from its own futures only
+        results = []
+        for futures, error in zip(batch_futures, errors):
+            if error is None:
+                try:
+                    results.append([future.result() for future in futures])
+                    continue
+                except Exception as e:
+                    error = e
+            # Don't render the rest of a batch that has already failed
+            for future in futures:
+                future.cancel()
+            if not return_exceptions:
+                for other in batch_futures:
+                    for future in other:
+                        future.cancel()
+                raise error
+            results.append(error)
+        return results
+
+    if executor is None:
+        caption_count = sum(len(texts) for _, texts, _ in batches)
+        max_workers = max(1, min(caption_count, available_cpus()))
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return render(pool)
+    return render(executor)
 
 
 def generate_batch_local(
-    captions: List[Dict[str, str]],
+    texts: List[str],
+    types: List[str],
     setting_name: str = "default",
     output_dir: Optional[Path] = None,
     config: Optional[Config] = None,
+    font: Optional[ImageFont.FreeTypeFont] = None,
 ) -> List[Path]:
     """
     Generate a batch of collages and save to local paths (legacy mode).
@@ -316,10 +571,12 @@ def generate_batch_local(
     This matches the original script's output structure for local CLI usage.
 
     Args:
-        captions: List of dicts with "text" and "type" keys
+        texts: Caption texts, one per collage
+        types: "neg" or "pos" for each entry of texts
         setting_name: Layout setting name
         output_dir: Override output directory
         config: Configuration instance
+        font: Preloaded caption font. Loaded once if not provided.
 
     Returns:
         List of local file paths to generated images
@@ -331,24 +588,27 @@ def generate_batch_local(
 
     output_dir.mkdir(parents=True, exist_ok=True)
     setting_config = config.get_setting(setting_name)
+    font = font or load_font(config)
 
     paths = []
 
-    for i, entry in enumerate(captions):
+    for i, (caption, kind) in enumerate(zip(texts, types)):
         folder_index = (i // 2) + 1
         folder = output_dir / f"img_{folder_index}"
         folder.mkdir(parents=True, exist_ok=True)
 
-        kind = entry["type"]
-        caption = entry["text"]
-
         # Generate collage
-        collage = generate_collage(caption, kind, setting_name, config)
+        collage = generate_collage(caption, kind, setting_name, config, font)
 
         # Save locally
         filename = f"{kind}_{i + 1}.png"
         output_path = folder / filename
-        collage.convert("RGB").save(output_path, format="PNG")
+        collage.save(
+            output_path,
+            format="PNG",
+            compress_level=config.PNG_COMPRESS_LEVEL,
+            optimize=False,
+        )
 
         print(f"Saved: {output_path}")
         paths.append(output_path)
@@ -4,6 +4,7 @@ Storage backend abstraction for the Content Engine.
 Provides:
 - StorageBackend: Abstract base class
 - LocalStorageBackend: Saves to local filesystem, serves via static mount
+- NullStorageBackend: Discards images (used for startup warmup)
 - (Future) S3StorageBackend: Upload to S3/R2 object storage
 
 Usage:
@@ -13,6 +14,7 @@ Usage:
 """
 
 import abc
+import re
 import uuid
 from dataclasses import dataclass
 from datetime import date
@@ -23,6 +25,9 @@ from PIL import Image
 
 from .config import Config, get_config
 
+# Shape of the IDs made by StorageBackend.generate_batch_id
+_GENERATED_BATCH_ID = re.compile(r"[0-9a-f]{8}")
+
 
 @dataclass
 class SaveResult:
@@ -57,7 +62,7 @@ class StorageBackend(abc.ABC):
         pass
 
     @abc.abstractmethod
-    def get_batch_dir(self, batch_id: str) -> Path:
+    def get_batch_dir(self, batch_id: str, today: Optional[str] = None) -> Path:
         """Get the directory path for a batch."""
         pass
 
@@ -66,6 +71,11 @@ class StorageBackend(abc.ABC):
         """Generate a unique batch ID."""
         return str(uuid.uuid4())[:8]
 
+    @staticmethod
+    def is_generated_batch_id(batch_id: str) -> bool:
+        """Whether batch_id has the shape of one made by generate_batch_id."""
+        return _GENERATED_BATCH_ID.fullmatch(batch_id) is not None
+
 
 class LocalStorageBackend(StorageBackend):
     """
@@ -89,15 +99,20 @@ class LocalStorageBackend(StorageBackend):
             config: Configuration instance. Uses global config if not provided.
         """
         self.config = config or get_config()
+        # public_base_url is already stripped of its trailing slash by Config
+        self._base = self.config.public_base_url
+        # Batch paths are built from one string instead of joining Paths
+        self._output_dir = str(self.config.output_dir)
 
-    def get_batch_dir(self, batch_id: str) -> Path:
+    def get_batch_dir(self, batch_id: str, today: Optional[str] = None) -> Path:
         """
         Get the directory path for a batch.
 
-        Structure: {output_dir}/{date}/{batch_id}/
+        Structure: {output_dir}/{date}/{batch_id}/, where date is today
+        (ISO format) unless given.
         """
-        today = date.today().isoformat()
-        return self.config.output_dir / today / batch_id
+        today = today or date.today().isoformat()
+        return Path(f"{self._output_dir}/{today}/{batch_id}")
 
     def save(
         self,
@@ -116,20 +131,25 @@ class LocalStorageBackend(StorageBackend):
         Returns:
             SaveResult with local path and public URL
         """
-        batch_dir = self.get_batch_dir(batch_id)
+        # One date for both the path and the URL (also keeps them consistent
+        # if a save straddles midnight)
+        today = date.today().isoformat()
+        batch_dir = self.get_batch_dir(batch_id, today)
         batch_dir.mkdir(parents=True, exist_ok=True)
 
         local_path = batch_dir / filename
 
-        # Ensure RGB for PNG save
-        if image.mode == "RGBA":
-            image = image.convert("RGB")
-        image.save(local_path, format="PNG")
+        # Saved in the image's own mode - collages are already RGB
+        image.save(
+            local_path,
+            format="PNG",
+            compress_level=self.config.PNG_COMPRESS_LEVEL,
+            optimize=False,
+        )
 
         # Construct public URL
         # Path relative to output_dir for URL construction
-        today = date.today().isoformat()
-        url = f"{self.config.public_base_url}/output/{today}/{batch_id}/{filename}"
+        url = f"{self._base}/output/{today}/{batch_id}/{filename}"
 
         return SaveResult(
             filename=filename,
@@ -139,6 +159,30 @@ class LocalStorageBackend(StorageBackend):
         )
 
 
+class NullStorageBackend(StorageBackend):
+    """
+    Storage backend that discards every image.
+
+    Used to warm up the generator at startup without writing files.
+    """
+
+    def get_batch_dir(self, batch_id: str, today: Optional[str] = None) -> Path:
+        return Path(batch_id)
+
+    def save(
+        self,
+        image: Image.Image,
+        batch_id: str,
+        filename: str,
+    ) -> SaveResult:
+        return SaveResult(
+            filename=filename,
+            local_path=self.get_batch_dir(batch_id) / filename,
+            url="",
+            batch_id=batch_id,
+        )
+
+
 class S3StorageBackend(StorageBackend):
     """
     S3/R2 object storage backend (stub for future implementation).
@@ -157,8 +201,8 @@ class S3StorageBackend(StorageBackend):
             "Use LocalStorageBackend for now."
         )
 
-    def get_batch_dir(self, batch_id: str) -> Path:
-        today = date.today().isoformat()
+    def get_batch_dir(self, batch_id: str, today: Optional[str] = None) -> Path:
+        today = today or date.today().isoformat()
         return Path(f"{today}/{batch_id}")
 
     def save(
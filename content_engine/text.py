@@ -0,0 +1,103 @@
+"""
+Text rendering helpers shared by the collage and video generators.
+
+Provides:
+- get_font: TrueType fonts, parsed once per (path, size) per thread
+- text_bbox: Cached text measurement
+- draw_text: Draws text by pasting a cached alpha mask
+
+Rendered text is cached as an "L" mask keyed by text, font and subpixel
+offset, so a caption drawn again costs a masked paste instead of a
+FreeType rasterization. Output is identical to ImageDraw.text.
+"""
+
+import threading
+from functools import lru_cache
+from typing import Tuple, Union
+
+from PIL import Image, ImageDraw, ImageFont
+
+_thread_local = threading.local()
+
+# Scratch surface for text measurement (textbbox doesn't depend on the image)
+_MEASURE_DRAW = ImageDraw.Draw(Image.new("L", (1, 1)))
+
+
+def get_font(path_str: str, size: int) -> ImageFont.FreeTypeFont:
+    """
+    Load a font once per (path, size) per thread.
+
+    FreeType faces aren't safe to draw with from several threads at once,
+    so every thread keeps its own copy.
+    """
+    fonts = _thread_local.__dict__.setdefault("fonts", {})
+    font = fonts.get((path_str, size))
+    if font is None:
+        font = fonts[(path_str, size)] = ImageFont.truetype(path_str, size)
+    return font
+
+
+@lru_cache(maxsize=2048)
+def text_bbox(
+    text: str, font_path_str: str, size: int, align: str = "left"
+) -> Tuple[int, int, int, int]:
+    """Measure text drawn at (0, 0), as ImageDraw.textbbox (cached)."""
+    font = get_font(font_path_str, size)
+    return _MEASURE_DRAW.textbbox((0, 0), text, font=font, align=align)
+
+
+@lru_cache(maxsize=256)
+def _text_mask(
+    text: str,
+    font_path_str: str,
+    size: int,
+    start: Tuple[float, float],
+    align: str,
+) -> Tuple[Image.Image, int, int]:
+    """
+    Render text into an "L" mask at a subpixel start offset.
+
+    Returns (mask, dx, dy): the text as drawn at start, shifted right/down by
+    whole pixels (dx, dy) so it lies inside the mask. The mask is shared -
+    only paste with it, never modify it.
+    """
+    font = get_font(font_path_str, size)
+    left, top, right, bottom = _MEASURE_DRAW.textbbox(
+        start, text, font=font, align=align
+    )
+    # Whole-pixel shifts keep ImageDraw's subpixel phase (it splits xy into
+    # int() and the fractional remainder)
+    dx = max(0, -int(left // 1)) + 1
+    dy = max(0, -int(top // 1)) + 1
+    mask = Image.new("L", (int(right) + dx + 2, int(bottom) + dy + 2))
+    ImageDraw.Draw(mask).text(
+        (start[0] + dx, start[1] + dy), text, font=font, fill=255, align=align
+    )
+    return mask, dx, dy
+
+
+def draw_text(
+    image: Image.Image,
+    xy: Tuple[float, float],
+    text: str,
+    font_path_str: str,
+    size: int,
+    fill: Union[int, Tuple[int, ...]],
+    align: str = "left",
+) -> None:
+    """
+    Draw text onto image, like ImageDraw.Draw(image).text(xy, ...).
+
+    Args:
+        image: Image to draw on (modified in place)
+        xy: Top-left anchor, as for ImageDraw.text
+        text: Text to draw (may contain newlines)
+        font_path_str: Path to the TrueType font
+        size: Font size
+        fill: Text color in the image's mode
+        align: Multiline alignment ("left", "center" or "right")
+    """
+    x, y = xy
+    ix, iy = int(x), int(y)
+    mask, dx, dy = _text_mask(text, font_path_str, size, (x - ix, y - iy), align)
+    image.paste(fill, (ix - dx, iy - dy), mask)
@@ -2,32 +2,26 @@
 Video Generator Module
 
 Generates TikTok-ready videos with banner overlays from a library of templates.
+
+The whole edit (trim, scale/crop to 1080x1920, banner overlay) is a single
+ffmpeg filter graph, so frames are decoded and encoded once and never pass
+through Python.
 """
 
 import os
+import re
 import subprocess
 import tempfile
 import textwrap
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
-
-# Force system ffmpeg BEFORE importing moviepy (critical for Railway)
-# MoviePy 2.0 uses FFMPEG_BINARY (not IMAGEIO_FFMPEG_EXE)
-if not os.environ.get("FFMPEG_BINARY"):
-    # Railway has static ffmpeg at /usr/local/bin/ffmpeg
-    # Fall back to system ffmpeg for local development
-    if os.path.exists("/usr/local/bin/ffmpeg"):
-        os.environ["FFMPEG_BINARY"] = "/usr/local/bin/ffmpeg"
-    else:
-        import shutil
-        ffmpeg_path = shutil.which("ffmpeg")
-        if ffmpeg_path:
-            os.environ["FFMPEG_BINARY"] = ffmpeg_path
+from typing import Optional, Tuple
 
-from moviepy import VideoFileClip, ImageClip, CompositeVideoClip, ColorClip
 from PIL import Image, ImageDraw, ImageFont
 import numpy as np
 
+from .text import draw_text, get_font
+
 # Get ffmpeg path from env (Railway uses static build at /usr/local/bin/ffmpeg)
 FFMPEG_PATH = os.environ.get("IMAGEIO_FFMPEG_EXE", "ffmpeg")
 
@@ -42,6 +36,75 @@ TRIM_END_SECONDS = 1  # Cut last 1 second of video
 PADDING = 40  # Horizontal padding for text
 
 
+@lru_cache(maxsize=512)
+def _layout_banner(
+    caption: str,
+    font_path_str: str,
+    width: int,
+    height: int,
+) -> Tuple[Optional[int], str, int, int]:
+    """
+    Pick the font size and line wrapping for a banner caption.
+
+    Uses the largest candidate size whose wrapped text fits. Deterministic
+    for a given caption and banner size, so cached.
+
+    Returns:
+        (font_size, wrapped_text, text_width, text_height). font_size is
+        None if the font file can't be loaded and the default font is used.
+    """
+    # Available width for text (with padding)
+    max_text_width = width - (PADDING * 2)
+    max_text_height = height - (PADDING * 2)
+
+    # Candidate font sizes: 20 to 60 in steps of 4
+    max_font_size = 60  # Start smaller
+    min_font_size = 20
+    sizes = range(min_font_size, max_font_size + 1, 4)
+
+    try:
+        get_font(font_path_str, max_font_size)
+    except OSError:
+        # Fallback to default font if custom font fails
+        draw = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+        bbox = draw.textbbox((0, 0), caption, font=ImageFont.load_default())
+        return None, caption, bbox[2] - bbox[0], bbox[3] - bbox[1]
+
+    def wrap_and_measure(font_size: int) -> Tuple[str, int, int]:
+        # Wrap to an approximate chars-per-line for this size, then measure
+        avg_char_width = font_size * 0.6  # Approximate
+        chars_per_line = int(max_text_width / avg_char_width)
+        chars_per_line = max(10, chars_per_line)  # Minimum 10 chars per line
+
+        wrapped_text = textwrap.fill(caption, width=chars_per_line)
+
+        # Measure with per-line font.getbbox instead of a multiline
+        # draw.textbbox. Same extent (lines are stacked at the pitch ImageDraw
+        # uses: bbox of "A" plus 4px spacing) without the draw-context layout
+        font = get_font(font_path_str, font_size)
+        line_pitch = font.getbbox("A")[3] + 4
+        boxes = [font.getbbox(line) for line in wrapped_text.split("\n")]
+        left = min(box[0] for box in boxes)
+        right = max(box[2] for box in boxes)
+        top = boxes[0][1]
+        bottom = (len(boxes) - 1) * line_pitch + boxes[-1][3]
+        return wrapped_text, right - left, bottom - top
+
+    def fits(layout: Tuple[str, int, int]) -> bool:
+        return layout[1] <= max_text_width and layout[2] <= max_text_height
+
+    # Largest size that fits, trying sizes from the top. This can't be a
+    # binary search: chars_per_line is only an estimate, so a smaller size
+    # can wrap into more lines than a bigger one and fitting isn't monotonic
+    # in the size. If even the smallest size doesn't fit, use it anyway.
+    for font_size in reversed(sizes):
+        layout = wrap_and_measure(font_size)
+        if fits(layout):
+            break
+
+    return (font_size, *layout)
+
+
 class VideoNotFoundError(Exception):
     """Raised when a video scenario is not found in the library."""
     def __init__(self, scenario: str, library_path: Path, detail: str = ""):
@@ -53,6 +116,7 @@ class VideoNotFoundError(Exception):
         super().__init__(msg)
 
 
+@lru_cache(maxsize=16)
 def create_banner_image(
     caption: str,
     font_path: Path,
@@ -69,99 +133,88 @@ def create_banner_image(
         height: Banner height in pixels
 
     Returns:
-        numpy array of the banner image (RGB)
+        numpy array of the banner image (RGB). Memoized per arguments, so
+        the array is shared and read-only
     """
     # Create white background
     img = Image.new("RGB", (width, height), color=(255, 255, 255))
-    draw = ImageDraw.Draw(img)
-
-    # Available width for text (with padding)
-    max_text_width = width - (PADDING * 2)
-    max_text_height = height - (PADDING * 2)
-
-    # Find optimal font size with text wrapping
-    font_size = 60  # Start smaller
-    min_font_size = 20
 
-    font = None
-    wrapped_text = caption
-
-    while font_size >= min_font_size:
-        try:
-            font = ImageFont.truetype(str(font_path), font_size)
-        except OSError:
-            # Fallback to default font if custom font fails
-            font = ImageFont.load_default()
-            break
-
-        # Try to wrap text to fit width
-        avg_char_width = font_size * 0.6  # Approximate
-        chars_per_line = int(max_text_width / avg_char_width)
-        chars_per_line = max(10, chars_per_line)  # Minimum 10 chars per line
-
-        wrapped_text = textwrap.fill(caption, width=chars_per_line)
-
-        # Measure text bounding box
-        bbox = draw.textbbox((0, 0), wrapped_text, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-
-        # Check if text fits
-        if text_width <= max_text_width and text_height <= max_text_height:
-            break
-
-        font_size -= 4
+    # Font size, wrapping and text size (memoized per caption)
+    font_size, wrapped_text, text_width, text_height = _layout_banner(
+        caption, str(font_path), width, height
+    )
 
     # Calculate centered position
-    bbox = draw.textbbox((0, 0), wrapped_text, font=font)
-    text_width = bbox[2] - bbox[0]
-    text_height = bbox[3] - bbox[1]
-
     x = (width - text_width) / 2
     y = (height - text_height) / 2
 
-    # Draw text (black color)
-    draw.text((x, y), wrapped_text, font=font, fill=(0, 0, 0), align="center")
+    # Draw text (black color) - pasted from the cached text mask
+    if font_size is None:
+        draw = ImageDraw.Draw(img)
+        draw.text(
+            (x, y), wrapped_text, font=ImageFont.load_default(),
+            fill=(0, 0, 0), align="center",
+        )
+    else:
+        draw_text(
+            img, (x, y), wrapped_text, str(font_path), font_size,
+            fill=(0, 0, 0), align="center",
+        )
 
-    return np.array(img)
+    # asarray wraps the image's pixel bytes directly (one copy, where
+    # np.array would make a second), and the result is already read-only
+    banner = np.asarray(img)
+    return banner
 
 
-def resize_video_to_tiktok(clip: VideoFileClip) -> VideoFileClip:
+def probe_video(video_file: str) -> Tuple[Optional[float], Optional[str]]:
     """
-    Resize and crop video to 1080x1920 TikTok format.
+    Get a video's duration and first audio codec from ffmpeg's input banner.
 
-    Strategy:
-    - Scale to fit width (1080px)
-    - Center crop to fit height (1920px)
-    - If video is shorter than 1920, scale to fit height instead and crop width
+    Returns:
+        (duration in seconds, audio codec name). Either is None if ffmpeg
+        doesn't report it.
     """
-    orig_w, orig_h = clip.size
-    target_w, target_h = OUTPUT_WIDTH, OUTPUT_HEIGHT
-    target_aspect = target_w / target_h  # 0.5625
-    orig_aspect = orig_w / orig_h
-
-    if orig_aspect > target_aspect:
-        # Video is wider than target - fit to height, crop width
-        new_height = target_h
-        new_width = int(orig_w * (target_h / orig_h))
-        clip = clip.resized(height=new_height)
-        # Center crop width
-        x_center = new_width / 2
-        x1 = int(x_center - target_w / 2)
-        clip = clip.cropped(x1=x1, x2=x1 + target_w, y1=0, y2=target_h)
-    else:
-        # Video is taller than target (or equal) - fit to width, crop height
-        new_width = target_w
-        new_height = int(orig_h * (target_w / orig_w))
-        clip = clip.resized(width=new_width)
-        # Center crop height
-        y_center = new_height / 2
-        y1 = int(y_center - target_h / 2)
-        # Clamp y1 to valid range
-        y1 = max(0, min(y1, new_height - target_h))
-        clip = clip.cropped(x1=0, x2=target_w, y1=y1, y2=y1 + target_h)
+    result = subprocess.run(
+        [FFMPEG_PATH, "-hide_banner", "-i", video_file],
+        capture_output=True,
+        timeout=30,
+    )
+    # ffmpeg exits non-zero without an output file, but still prints the info
+    duration = None
+    match = re.search(
+        rb"Duration: (\d+):(\d{2}):(\d{2}(?:\.\d+)?)", result.stderr
+    )
+    if match:
+        hours, minutes, seconds = match.groups()
+        duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    match = re.search(rb"Stream #\d+:\d+\S*: Audio: (\w+)", result.stderr)
+    audio_codec = match.group(1).decode() if match else None
+    return duration, audio_codec
+
+
+def tiktok_filter_graph(top_offset: int = VIDEO_TOP_OFFSET) -> str:
+    """
+    Build the ffmpeg filter graph for the TikTok layout.
 
-    return clip
+    Input 0 is the source video, input 1 the banner image. The video is
+    scaled to cover 1080x1920 and center-cropped (as if fitting width or
+    height, whichever is needed), placed top_offset px down on black, with
+    the part below the frame cut off, and the banner overlaid at the top.
+    """
+    w, h = OUTPUT_WIDTH, OUTPUT_HEIGHT
+    visible_h = h - top_offset
+    return (
+        f"[0:v]scale={w}:{h}:force_original_aspect_ratio=increase,"
+        # Center crop, keeping only the rows that stay on screen
+        f"crop={w}:{visible_h}:(iw-{w})/2:(ih-{h})/2,"
+        # The black margin comes from pad, inside the same filter chain, so
+        # there is no full-frame background layer to composite. Cropping the
+        # rows under the banner and vstacking measured no faster (scale and
+        # the encode dominate) and changes the banner's chroma conversion
+        f"pad={w}:{h}:0:{top_offset}:black,setsar=1[bg];"
+        f"[bg][1:v]overlay=0:0,format=yuv420p[out]"
+    )
 
 
 def generate_video(
@@ -224,68 +277,42 @@ def generate_video(
         raise ValueError("Either video_url or library_path must be provided")
 
     try:
-        # Load video
-        video = VideoFileClip(video_file)
-        original_fps = video.fps
-
-        # Trim first N seconds and last M seconds
-        total_trim = trim_start + trim_end
-        if video.duration > total_trim:
-            video = video.subclipped(trim_start, video.duration - trim_end)
+        duration, audio_codec = probe_video(video_file)
 
-        # Get audio after trim
-        original_audio = video.audio
+        # Trim first N seconds and last M seconds by seeking the input, so
+        # the cut frames are never decoded
+        trim_args = []
+        if (trim_start or trim_end) and duration is not None and duration > trim_start + trim_end:
+            trim_args = ["-ss", str(trim_start), "-to", str(duration - trim_end)]
 
-        # Resize to TikTok format
-        video = resize_video_to_tiktok(video)
-
-        # Create banner - set explicit FPS to match video (fixes static frame bug)
+        # Banner is fed to ffmpeg as one raw RGB frame on stdin
         banner_array = create_banner_image(caption, font_path)
-        banner_clip = (
-            ImageClip(banner_array)
-            .with_duration(video.duration)
-            .with_fps(original_fps)
-        )
-
-        # Position banner at top (0, 0)
-        banner_clip = banner_clip.with_position((0, 0))
-
-        # Position video with offset from top
-        video = video.with_position((0, VIDEO_TOP_OFFSET))
-
-        # Create black background - set explicit FPS to match video
-        background = (
-            ColorClip(size=(OUTPUT_WIDTH, OUTPUT_HEIGHT), color=(0, 0, 0))
-            .with_duration(video.duration)
-            .with_fps(original_fps)
-        )
-
-        # Composite: background, then video (offset), then banner on top
-        final = CompositeVideoClip(
-            [background, video, banner_clip],
-            size=(OUTPUT_WIDTH, OUTPUT_HEIGHT)
-        )
-
-        # Preserve audio
-        if original_audio is not None:
-            final = final.with_audio(original_audio)
+        banner_h, banner_w = banner_array.shape[:2]
 
         # Export (use fast preset and single thread to reduce memory on Railway)
         # -pix_fmt yuv420p ensures compatibility with all players (fixes static frame on some devices)
-        final.write_videofile(
+        cmd = [
+            FFMPEG_PATH, "-y", "-hide_banner", "-loglevel", "error",
+            *trim_args, "-i", video_file,
+            "-f", "rawvideo", "-pix_fmt", "rgb24",
+            "-s", f"{banner_w}x{banner_h}", "-i", "pipe:0",
+            "-filter_complex", tiktok_filter_graph(),
+            "-map", "[out]", "-map", "0:a?",
+            "-c:v", "libx264", "-preset", "ultrafast", "-threads", "1",
+            "-pix_fmt", "yuv420p",
+            # AAC sources (the usual case) keep their audio as is
+            "-c:a", "copy" if audio_codec == "aac" else "aac",
             str(output_path),
-            fps=original_fps,
-            codec="libx264",
-            audio_codec="aac",
-            preset="ultrafast",
-            threads=1,
-            logger=None,  # Suppress moviepy progress output
-            ffmpeg_params=["-pix_fmt", "yuv420p"],
+        ]
+        result = subprocess.run(
+            cmd,
+            input=banner_array.data,
+            capture_output=True,
+            timeout=600,
         )
-
-        # Cleanup
-        video.close()
-        final.close()
+        if result.returncode != 0:
+            stderr = result.stderr.decode()[-500:] if result.stderr else "no stderr"
+            raise RuntimeError(f"ffmpeg exit={result.returncode}: {stderr}")
 
         return output_path
 
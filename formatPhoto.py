@@ -1,5 +1,6 @@
 # new_files_crop_only.py
 
+import multiprocessing as mp
 import os
 import re
 from PIL import Image
@@ -32,7 +33,31 @@ def crop_portrait(img):
     
     return img.resize(PORTRAIT_SIZE, Image.LANCZOS)
 
+def _crop_one(args):
+    original_path, part_path, f, is_portrait = args
+    try:
+        with Image.open(original_path) as img:
+            if original_path.lower().endswith((".jpg", ".jpeg")):
+                # Let libjpeg downscale during decode (1/2, 1/4, 1/8) while
+                # staying >= 1080px, instead of decoding full resolution
+                img.draft("RGB", (1080, 1080))
+            # convert() would copy the full-size image even when it's already RGB
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            # Use portrait crop for dashboard_portrait folders, regular crop for others
+            if is_portrait:
+                cropped = crop_portrait(img)
+            else:
+                cropped = crop_center(img)
+            cropped.save(part_path, "PNG")
+        return True
+    except Exception as e:
+        print(f"❌ Error: {f} → {e}")
+        return False
+
 def process_new_images(root_folder, prefix):
+    jobs = []
+    next_index = {}
     for subfolder in os.listdir(root_folder):
         sub_path = os.path.join(root_folder, subfolder)
         if not os.path.isdir(sub_path):
@@ -41,33 +66,37 @@ def process_new_images(root_folder, prefix):
         pattern = re.compile(rf"{prefix}_{subfolder}_(\d+)\.png")
         existing = [int(m.group(1)) for f in os.listdir(sub_path)
                     if (m := pattern.match(f))]
-        start_index = max(existing, default=0) + 1
+        next_index[sub_path] = max(existing, default=0) + 1
 
         files = sorted(f for f in os.listdir(sub_path)
                        if f.lower().endswith((".jpg", ".jpeg", ".png"))
                        and not pattern.match(f))
 
+        # Workers write to a ".part" file; the final names are handed out
+        # below, in input order and only to crops that succeeded, so a
+        # failed file leaves no gap in the numbering
+        is_portrait = subfolder == "dashboard_portrait"
         for f in files:
             original_path = os.path.join(sub_path, f)
-            new_name = f"{prefix}_{subfolder}_{start_index}.png"
-            new_path = os.path.join(sub_path, new_name)
+            jobs.append((original_path, original_path + ".part", f, is_portrait))
 
-            try:
-                with Image.open(original_path) as img:
-                    img = img.convert("RGB")
-                    # Use portrait crop for dashboard_portrait folders, regular crop for others
-                    if subfolder == "dashboard_portrait":
-                        cropped = crop_portrait(img)
-                    else:
-                        cropped = crop_center(img)
-                    cropped.save(new_path, "PNG")
-                if original_path != new_path:
-                    os.remove(original_path)
-                print(f"🆕 Cropped: {f} → {new_name}")
-                start_index += 1
-            except Exception as e:
-                print(f"❌ Error: {f} → {e}")
+    if not jobs:
+        return
+    # Each file is independent and CPU-bound (decode, resample, PNG encode).
+    # imap yields in input order, whichever worker finishes first
+    with mp.Pool() as pool:
+        for (original_path, part_path, f, _), ok in zip(jobs, pool.imap(_crop_one, jobs)):
+            if not ok:
+                continue
+            sub_path = os.path.dirname(original_path)
+            subfolder = os.path.basename(sub_path)
+            new_name = f"{prefix}_{subfolder}_{next_index[sub_path]}.png"
+            next_index[sub_path] += 1
+            os.replace(part_path, os.path.join(sub_path, new_name))
+            os.remove(original_path)
+            print(f"🆕 Cropped: {f} → {new_name}")
 
-# Run from inside followboost/
-process_new_images("negatives", "neg")
-process_new_images("positives", "pos")
\ No newline at end of file
+if __name__ == "__main__":
+    # Run from inside followboost/
+    process_new_images("negatives", "neg")
+    process_new_images("positives", "pos")
@@ -7,21 +7,35 @@ Outputs TikTok-ready 1080x1920 vertical video.
 
 Usage:
     python video_banner.py --input video.mp4 --output output.mp4 --caption "Your text here"
+    python video_banner.py --inputs "clips/*.mp4" --out-dir out/ --caption "Your text here"
 
 Example:
     python video_banner.py --input myvideo.mp4 --output final.mp4 --caption "Follow for more tips! 🔥"
 """
 
 import argparse
+import glob
 import os
+import re
+import subprocess
 import sys
 import textwrap
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+from typing import List, Optional, Tuple
 
-from moviepy import VideoFileClip, ImageClip, CompositeVideoClip, ColorClip
 from PIL import Image, ImageDraw, ImageFont
 import numpy as np
 
+try:
+    from imageio_ffmpeg import get_ffmpeg_exe
+except ImportError:
+    get_ffmpeg_exe = None
+
+# imageio-ffmpeg's bundled binary (honours IMAGEIO_FFMPEG_EXE), else PATH
+FFMPEG_PATH = get_ffmpeg_exe() if get_ffmpeg_exe else os.environ.get("IMAGEIO_FFMPEG_EXE", "ffmpeg")
+
 # Constants
 OUTPUT_WIDTH = 1080
 OUTPUT_HEIGHT = 1920
@@ -33,6 +47,19 @@ FONT_PATH = Path(__file__).parent / "fonts" / "tiktok-sans-scm.ttf"
 PADDING = 40  # Horizontal padding for text
 
 
+@lru_cache(maxsize=None)
+def load_font(font_size: int) -> ImageFont.FreeTypeFont:
+    """
+    Load FONT_PATH at a size, parsing the TTF once per size.
+
+    Sizes load on first use rather than all at import: the binary search
+    only ever touches a handful of the candidates, and a missing font must
+    fall back to the default font instead of failing the import.
+    """
+    return ImageFont.truetype(str(FONT_PATH), font_size)
+
+
+@lru_cache(maxsize=64)
 def create_banner_image(caption: str, width: int = OUTPUT_WIDTH, height: int = BANNER_HEIGHT) -> np.ndarray:
     """
     Create a white banner with centered caption text.
@@ -43,7 +70,8 @@ def create_banner_image(caption: str, width: int = OUTPUT_WIDTH, height: int = B
         height: Banner height in pixels
 
     Returns:
-        numpy array of the banner image (RGB)
+        numpy array of the banner image (RGB). Memoized per caption and
+        size, so the array is shared and read-only
     """
     # Create white background
     img = Image.new("RGB", (width, height), color=(255, 255, 255))
@@ -53,38 +81,41 @@ def create_banner_image(caption: str, width: int = OUTPUT_WIDTH, height: int = B
     max_text_width = width - (PADDING * 2)
     max_text_height = height - (PADDING * 2)
 
-    # Find optimal font size with text wrapping
-    font_size = 80  # Start large
+    # Candidate font sizes: 24 to 80 in steps of 4
+    max_font_size = 80  # Start large
     min_font_size = 24
+    sizes = range(min_font_size, max_font_size + 1, 4)
 
-    font = None
-    wrapped_text = caption
-
-    while font_size >= min_font_size:
-        try:
-            font = ImageFont.truetype(str(FONT_PATH), font_size)
-        except OSError:
-            # Fallback to default font if custom font fails
-            font = ImageFont.load_default()
-            break
-
+    def wrap_and_measure(font):
         # Try to wrap text to fit width
-        avg_char_width = font_size * 0.6  # Approximate
+        avg_char_width = font.size * 0.6  # Approximate
         chars_per_line = int(max_text_width / avg_char_width)
         chars_per_line = max(10, chars_per_line)  # Minimum 10 chars per line
 
-        wrapped_text = textwrap.fill(caption, width=chars_per_line)
-
-        # Measure text bounding box
-        bbox = draw.textbbox((0, 0), wrapped_text, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
+        wrapped = textwrap.fill(caption, width=chars_per_line)
 
-        # Check if text fits
-        if text_width <= max_text_width and text_height <= max_text_height:
-            break
+        # Measure text bounding box and check if text fits
+        bbox = draw.textbbox((0, 0), wrapped, font=font)
+        fits = bbox[2] - bbox[0] <= max_text_width and bbox[3] - bbox[1] <= max_text_height
+        return wrapped, fits
 
-        font_size -= 4
+    try:
+        load_font(max_font_size)
+    except OSError:
+        # Fallback to default font if custom font fails
+        font = ImageFont.load_default()
+        wrapped_text = caption
+    else:
+        # Largest size that fits, trying sizes from the top. This can't be a
+        # binary search: chars_per_line is only an estimate, so a smaller
+        # size can wrap into more lines than a bigger one and fitting isn't
+        # monotonic in the size. If even the smallest size doesn't fit, use
+        # it anyway.
+        for font_size in reversed(sizes):
+            font = load_font(font_size)
+            wrapped_text, fits = wrap_and_measure(font)
+            if fits:
+                break
 
     # Calculate centered position
     bbox = draw.textbbox((0, 0), wrapped_text, font=font)
@@ -97,120 +128,181 @@ def create_banner_image(caption: str, width: int = OUTPUT_WIDTH, height: int = B
     # Draw text (black color)
     draw.text((x, y), wrapped_text, font=font, fill=(0, 0, 0), align="center")
 
-    return np.array(img)
+    # asarray wraps the image's pixel bytes directly (one copy, where
+    # np.array would make a second), and the result is already read-only
+    banner = np.asarray(img)
+    return banner
 
 
-def resize_video_to_tiktok(clip: VideoFileClip) -> VideoFileClip:
+def probe_video(input_path: str) -> Tuple[Optional[float], Optional[str]]:
     """
-    Resize and crop video to 1080x1920 TikTok format.
+    Get a video's duration in seconds and first audio codec from ffmpeg's
+    input banner (either is None if not reported).
+    """
+    result = subprocess.run(
+        [FFMPEG_PATH, "-hide_banner", "-i", input_path],
+        capture_output=True,
+        timeout=30,
+    )
+    # ffmpeg exits non-zero without an output file, but still prints the info
+    duration = None
+    match = re.search(rb"Duration: (\d+):(\d{2}):(\d{2}(?:\.\d+)?)", result.stderr)
+    if match:
+        hours, minutes, seconds = match.groups()
+        duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    match = re.search(rb"Stream #\d+:\d+\S*: Audio: (\w+)", result.stderr)
+    audio_codec = match.group(1).decode() if match else None
+    return duration, audio_codec
+
+
+# Hardware H.264 encoders to try, in order, with their quality settings
+HW_ENCODERS = [
+    ("h264_nvenc", ["-preset", "p4", "-tune", "hq", "-rc", "vbr", "-cq", "23"]),
+    ("h264_videotoolbox", ["-b:v", "8M"]),
+]
+
+
+@lru_cache(maxsize=1)
+def hardware_encoder() -> Optional[Tuple[str, Tuple[str, ...]]]:
+    """
+    Find a working hardware H.264 encoder as (codec, params), or None.
 
-    Strategy:
-    - Scale to fit width (1080px)
-    - Center crop to fit height (1920px)
-    - If video is shorter than 1920, scale to fit height instead and crop width
+    An encoder being listed by `ffmpeg -encoders` doesn't mean the device is
+    there, so each one is tried on a single small frame with the same params
+    it will be run with. Probed once, on first use.
     """
-    orig_w, orig_h = clip.size
-    target_w, target_h = OUTPUT_WIDTH, OUTPUT_HEIGHT
-    target_aspect = target_w / target_h  # 0.5625
-    orig_aspect = orig_w / orig_h
+    for codec, params in HW_ENCODERS:
+        try:
+            result = subprocess.run(
+                [FFMPEG_PATH, "-hide_banner", "-loglevel", "error",
+                 "-f", "lavfi", "-i", "color=black:size=256x256",
+                 "-frames:v", "1", "-c:v", codec, *params, "-f", "null", "-"],
+                capture_output=True,
+                timeout=15,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            continue
+        if result.returncode == 0:
+            return codec, tuple(params)
+    return None
+
+
+def video_encoder_args(threads: Optional[int] = None) -> List[str]:
+    """
+    ffmpeg video encoder arguments, preferring hardware H.264.
 
-    if orig_aspect > target_aspect:
-        # Video is wider than target - fit to height, crop width
-        new_height = target_h
-        new_width = int(orig_w * (target_h / orig_h))
-        clip = clip.resized(height=new_height)
-        # Center crop width
-        x_center = new_width / 2
-        x1 = int(x_center - target_w / 2)
-        clip = clip.cropped(x1=x1, x2=x1 + target_w, y1=0, y2=target_h)
-    else:
-        # Video is taller than target (or equal) - fit to width, crop height
-        new_width = target_w
-        new_height = int(orig_h * (target_w / orig_w))
-        clip = clip.resized(width=new_width)
-        # Center crop height
-        y_center = new_height / 2
-        y1 = int(y_center - target_h / 2)
-        # Clamp y1 to valid range
-        y1 = max(0, min(y1, new_height - target_h))
-        clip = clip.cropped(x1=0, x2=target_w, y1=y1, y2=y1 + target_h)
+    Falls back to libx264 with the given number of threads (default: all
+    cores).
+    """
+    hw = hardware_encoder()
+    if hw is not None:
+        codec, params = hw
+        return ["-c:v", codec, *params]
+    return ["-c:v", "libx264", "-preset", "medium", "-threads", str(threads or os.cpu_count() or 1)]
 
-    return clip
 
+def tiktok_filter_graph() -> str:
+    """
+    Build the ffmpeg filter graph for the 1080x1920 TikTok layout.
 
-def add_banner_to_video(input_path: str, output_path: str, caption: str) -> None:
+    Input 0 is the video, input 1 the banner. The video is scaled to cover
+    1080x1920 and center-cropped (fit height and crop width for wide
+    sources, fit width and crop height for tall ones), placed
+    VIDEO_TOP_OFFSET px down on black with the part below the frame cut
+    off, and the banner overlaid at (0, 0).
+    """
+    w, h = OUTPUT_WIDTH, OUTPUT_HEIGHT
+    return (
+        f"[0:v]scale={w}:{h}:force_original_aspect_ratio=increase,"
+        f"crop={w}:{h - VIDEO_TOP_OFFSET}:(iw-{w})/2:(ih-{h})/2,"
+        f"pad={w}:{h}:0:{VIDEO_TOP_OFFSET}:black,setsar=1[bg];"
+        f"[bg][1:v]overlay=0:0,format=yuv420p[out]"
+    )
+
+
+def add_banner_to_video(input_path: str, output_path: str, caption: str, threads: Optional[int] = None) -> None:
     """
     Add a white banner with caption text to the top of a video.
 
+    Trim, resize, compositing and encoding all happen in one ffmpeg run,
+    so frames never pass through Python.
+
     Args:
         input_path: Path to input video file
         output_path: Path for output video file
         caption: Text to display in the banner
+        threads: libx264 threads (default: all cores)
     """
     print(f"Loading video: {input_path}")
 
-    # Load video
-    video = VideoFileClip(input_path)
-    original_fps = video.fps
-
-    print(f"Original size: {video.size[0]}x{video.size[1]}")
-    print(f"Original FPS: {original_fps}")
-    print(f"Duration: {video.duration:.2f}s")
+    duration, audio_codec = probe_video(input_path)
+    if duration is not None:
+        print(f"Duration: {duration:.2f}s")
 
-    # Trim first 5 seconds and last 1 second
+    # Trim first 5 seconds and last 1 second by seeking the input
+    trim_args = []
     total_trim = TRIM_START_SECONDS + TRIM_END_SECONDS
-    if video.duration > total_trim:
+    if duration is not None and duration > total_trim:
         print(f"Trimming first {TRIM_START_SECONDS}s and last {TRIM_END_SECONDS}s...")
-        video = video.subclipped(TRIM_START_SECONDS, video.duration - TRIM_END_SECONDS)
-        print(f"New duration: {video.duration:.2f}s")
+        trim_args = ["-ss", str(TRIM_START_SECONDS), "-to", str(duration - TRIM_END_SECONDS)]
+        print(f"New duration: {duration - total_trim:.2f}s")
     else:
         print(f"Warning: Video is shorter than {total_trim}s, not trimming")
 
-    # Get audio after trim
-    original_audio = video.audio
-
-    # Resize to TikTok format
-    print("Resizing to 1080x1920...")
-    video = resize_video_to_tiktok(video)
-
-    # Create banner
+    # Create banner (fed to ffmpeg as one raw RGB frame on stdin)
     print(f"Creating banner with caption: {caption[:50]}...")
     banner_array = create_banner_image(caption)
-    banner_clip = ImageClip(banner_array).with_duration(video.duration)
-
-    # Position banner at top (0, 0)
-    banner_clip = banner_clip.with_position((0, 0))
-
-    # Position video with 20px offset from top
-    video = video.with_position((0, VIDEO_TOP_OFFSET))
-
-    # Create black background
-    background = ColorClip(size=(OUTPUT_WIDTH, OUTPUT_HEIGHT), color=(0, 0, 0)).with_duration(video.duration)
+    banner_h, banner_w = banner_array.shape[:2]
+
+    # Resize to 1080x1920, offset the video below the top, overlay the
+    # banner and encode, keeping the source frame rate and audio
+    encoder_args = video_encoder_args(threads)
+    print(f"Exporting to: {output_path} ({encoder_args[1]})")
+    cmd = [
+        FFMPEG_PATH, "-y", "-hide_banner", "-loglevel", "error",
+        *trim_args, "-i", input_path,
+        "-f", "rawvideo", "-pix_fmt", "rgb24",
+        "-s", f"{banner_w}x{banner_h}", "-i", "pipe:0",
+        "-filter_complex", tiktok_filter_graph(),
+        "-map", "[out]", "-map", "0:a?",
+        *encoder_args,
+        # AAC sources (the usual case) keep their audio as is
+        "-c:a", "copy" if audio_codec == "aac" else "aac",
+        output_path,
+    ]
+    result = subprocess.run(cmd, input=banner_array.data, capture_output=True)
+    if result.returncode != 0:
+        stderr = result.stderr.decode(errors="replace")[-500:]
+        raise RuntimeError(f"ffmpeg exit={result.returncode}: {stderr}")
 
-    # Composite: background, then video (offset), then banner on top
-    print("Compositing video with banner...")
-    final = CompositeVideoClip([background, video, banner_clip], size=(OUTPUT_WIDTH, OUTPUT_HEIGHT))
+    print(f"Done! Output saved to: {output_path}")
 
-    # Preserve audio
-    if original_audio is not None:
-        final = final.with_audio(original_audio)
 
-    # Export
-    print(f"Exporting to: {output_path}")
-    final.write_videofile(
-        output_path,
-        fps=original_fps,
-        codec="libx264",
-        audio_codec="aac",
-        preset="medium",
-        threads=4,
-    )
+def add_banners_to_videos(jobs: List[Tuple[str, str, str]]) -> int:
+    """
+    Process several (input_path, output_path, caption) jobs in parallel.
 
-    # Cleanup
-    video.close()
-    final.close()
+    Returns the number of jobs that failed; each failure is reported on
+    stderr without stopping the others.
 
-    print(f"Done! Output saved to: {output_path}")
+    Runs one ffmpeg per worker process and splits the cores between them,
+    so the libx264 threads don't oversubscribe the machine. Each ffmpeg
+    decodes, composites and encodes natively, so there are no frames to
+    stream from Python and no encoder worth keeping alive between videos.
+    """
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(cpus, len(jobs)))
+    threads = max(1, cpus // workers)
+    failures = 0
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        futures = [ex.submit(add_banner_to_video, *job, threads=threads) for job in jobs]
+        for job, future in zip(jobs, futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error: {job[0]}: {e}", file=sys.stderr)
+                failures += 1
+    return failures
 
 
 def main():
@@ -219,14 +311,20 @@ def main():
     )
     parser.add_argument(
         "--input", "-i",
-        required=True,
         help="Input video file path"
     )
     parser.add_argument(
         "--output", "-o",
-        required=True,
         help="Output video file path"
     )
+    parser.add_argument(
+        "--inputs",
+        help="Glob of input videos to process in parallel (e.g. 'clips/*.mp4'); use with --out-dir"
+    )
+    parser.add_argument(
+        "--out-dir",
+        help="Output directory for --inputs (files keep their names)"
+    )
     parser.add_argument(
         "--caption", "-c",
         required=True,
@@ -235,8 +333,17 @@ def main():
 
     args = parser.parse_args()
 
+    if args.inputs:
+        if not args.out_dir:
+            parser.error("--inputs requires --out-dir")
+        inputs = sorted(p for p in glob.glob(args.inputs) if os.path.isfile(p))
+        if not inputs:
+            print(f"Error: No input files match: {args.inputs}", file=sys.stderr)
+            sys.exit(1)
+    elif not (args.input and args.output):
+        parser.error("either --input and --output, or --inputs and --out-dir, are required")
     # Validate input file
-    if not os.path.isfile(args.input):
+    elif not os.path.isfile(args.input):
         print(f"Error: Input file not found: {args.input}", file=sys.stderr)
         sys.exit(1)
 
@@ -244,8 +351,29 @@ def main():
     if not FONT_PATH.is_file():
         print(f"Warning: Font not found at {FONT_PATH}, using fallback font", file=sys.stderr)
 
-    # Process video
-    add_banner_to_video(args.input, args.output, args.caption)
+    # Process video(s)
+    if args.inputs:
+        jobs = [
+            (path, os.path.join(args.out_dir, Path(path).stem + ".mp4"), args.caption)
+            for path in inputs
+        ]
+        # Inputs that differ only by extension (a.mov, a.mp4) would overwrite
+        # each other's output
+        by_output = {}
+        for path, output_path, _ in jobs:
+            by_output.setdefault(output_path, []).append(path)
+        clashes = {out: paths for out, paths in by_output.items() if len(paths) > 1}
+        if clashes:
+            for output_path, paths in clashes.items():
+                print(f"Error: {output_path} would be written by: {', '.join(paths)}", file=sys.stderr)
+            sys.exit(1)
+        os.makedirs(args.out_dir, exist_ok=True)
+        failures = add_banners_to_videos(jobs)
+        if failures:
+            print(f"Error: {failures} of {len(jobs)} videos failed", file=sys.stderr)
+            sys.exit(1)
+    else:
+        add_banner_to_video(args.input, args.output, args.caption)
 
 
 if __name__ == "__main__":